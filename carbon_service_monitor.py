@@ -6,6 +6,7 @@ Real-time monitoring for Carbon Receipt and Carbon Footprint services
 
 import asyncio
 import aiohttp
+import heapq
 import time
 import json
 import logging
@@ -252,7 +253,7 @@ class CarbonServiceMonitor:
             service_name = list(self.api_endpoints.keys())[i]
             
             if isinstance(result, Exception):
-                logger.error(f"Error fetching {service_name}: {result}")
+                logger.error("Error fetching %s: %s", service_name, result)
                 # Create error service data
                 service_data[service_name] = ServiceHealthData(
                     service_name=service_name,
@@ -355,8 +356,8 @@ class CarbonServiceMonitor:
         if service_filter:
             logs = [log for log in logs if log.service == service_filter]
         
-        # Sort by timestamp (newest first) and limit
-        logs = sorted(logs, key=lambda x: x.timestamp, reverse=True)[:limit]
+        # Newest first, limited; a bounded heap avoids sorting the whole log
+        logs = heapq.nlargest(limit, logs, key=lambda x: x.timestamp)
         
         return [log.to_dict() for log in logs]
     
@@ -373,7 +374,7 @@ async def get_carbon_service_data():
     try:
         return await carbon_monitor.fetch_all_services()
     except Exception as e:
-        logger.error(f"Error in get_carbon_service_data: {e}")
+        logger.error("Error in get_carbon_service_data: %s", e)
         # Return empty data structure on error
         return {}
 
@@ -396,7 +397,7 @@ def get_carbon_service_data_sync():
             return asyncio.run(get_carbon_service_data())
             
     except Exception as e:
-        logger.error(f"Error in sync wrapper: {e}")
+        logger.error("Error in sync wrapper: %s", e)
         return {}
 
 def get_carbon_service_summary():
@@ -212,11 +212,12 @@ class EnhancedVMReportOrchestrator:
             if self.alert_system:
                 try:
                     alerts = self.alert_system.analyze_vm_alerts(vm_data)
-                    total_alerts = len(alerts['critical']) + len(alerts['warning']) + len(alerts['offline'])
+                    critical_count, warning_count, offline_count, _ = alerts.counts
+                    total_alerts = critical_count + warning_count + offline_count
                     self.stats['alerts_triggered'] = total_alerts
                     
                     # Check for power state changes
-                    power_changes = alerts.get('power_changes', [])
+                    power_changes = alerts.power_changes
                     if power_changes:
                         print("🔄 {} power state changes detected".format(len(power_changes)))
                         # Send power change alerts
@@ -224,10 +225,10 @@ class EnhancedVMReportOrchestrator:
                         self.stats['power_changes'] = len(power_changes)
                     
                     # Only show critical issues
-                    if alerts['critical'] or alerts['offline']:
+                    if critical_count or offline_count:
                         print("🚨 CRITICAL: {} alerts detected".format(total_alerts))
-                    elif alerts['warning']:
-                        print("⚠️ {} warnings detected".format(len(alerts['warning'])))
+                    elif warning_count:
+                        print("⚠️ {} warnings detected".format(warning_count))
                     else:
                         print("✅ All VMs healthy")
                         
@@ -244,7 +245,7 @@ class EnhancedVMReportOrchestrator:
             
         except Exception as e:
             self.logger.error("❌ Data collection failed: {}".format(e))
-            self.logger.debug(traceback.format_exc())
+            self.logger.debug("Traceback:", exc_info=True)
             self.stats['errors'] += 1
             return None, None
         finally:
@@ -435,7 +436,7 @@ class EnhancedVMReportOrchestrator:
             
         except Exception as e:
             self.logger.error("❌ Alert system failed: {}".format(e))
-            self.logger.debug(traceback.format_exc())
+            self.logger.debug("Traceback:", exc_info=True)
             self.stats['errors'] += 1
             return False
     
@@ -1007,8 +1008,7 @@ One Climate Co., Ltd. | Infrastructure Monitoring System
 
         except Exception as e:
             self.logger.error("⚠️ LINE notification failed: {}".format(e))
-            import traceback
-            self.logger.debug(traceback.format_exc())
+            self.logger.debug("Traceback:", exc_info=True)
             return False
     
     def _send_basic_email(self, summary: Dict[str, Any], pdf_path: Optional[Path] = None) -> bool:
@@ -1146,7 +1146,7 @@ One Climate Co., Ltd. | Infrastructure Monitoring System
             
         except Exception as e:
             self.logger.error("❌ Critical workflow failure: {}".format(e))
-            self.logger.debug(traceback.format_exc())
+            self.logger.debug("Traceback:", exc_info=True)
             self.stats['errors'] += 1
             return False
     
@@ -1343,9 +1343,9 @@ def run_simple_email_pdf_line():
         try:
             service_health_data = get_service_health_data()
             service_alerts = get_service_alerts()
-            orchestrator.logger.info(f"✅ Service health collected: {len(service_health_data.get('services', {}))} services")
+            orchestrator.logger.info("✅ Service health collected: %d services", len(service_health_data.get('services', {})))
         except Exception as e:
-            orchestrator.logger.warning(f"⚠️ Service health collection failed: {e}")
+            orchestrator.logger.warning("⚠️ Service health collection failed: %s", e)
             service_health_data = {
                 'services': {},
                 'summary': {
@@ -1412,7 +1412,7 @@ def run_simple_email_pdf_line():
     except Exception as e:
         if orchestrator.logger:
             orchestrator.logger.error("❌ Critical error: {}".format(e))
-            orchestrator.logger.debug(traceback.format_exc())
+            orchestrator.logger.debug("Traceback:", exc_info=True)
         else:
             print("❌ Critical error: {}".format(e))
             print(traceback.format_exc())
@@ -1535,7 +1535,7 @@ def main():
         error_msg = "Critical system error: {}".format(e)
         if orchestrator.logger:
             orchestrator.logger.critical("💥 {}".format(error_msg))
-            orchestrator.logger.debug(traceback.format_exc())
+            orchestrator.logger.debug("Traceback:", exc_info=True)
         else:
             print("💥 {}".format(error_msg))
             print(traceback.format_exc())
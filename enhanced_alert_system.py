@@ -2,30 +2,55 @@
 """
 Enhanced Alert System for VM Daily Report - WORKING VERSION
 Fixed to use LINE Bot SDK v2 (working version)
+
+Fast-ACK contract: request handlers (e.g. LINE webhooks, which must answer
+within 2 seconds) must not call send_comprehensive_alert directly. Use
+send_comprehensive_alert_async (returns a Future) or
+send_comprehensive_alert_aio (awaitable) so SMTP/LINE I/O runs on the
+alert worker pool and the handler can respond immediately.
 """
 
 import os
 import ssl
+import asyncio
+import atexit
+import functools
+import hashlib
+import logging
+import mmap
 import smtplib
+import string
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
-from dataclasses import dataclass
+from email.utils import formatdate, make_msgid
+from dataclasses import dataclass, field
 from enum import Enum
 
 # LINE Bot imports (v2 - working version)
 try:
     from linebot import LineBotApi
-    from linebot.models import TextSendMessage, FlexSendMessage, BubbleContainer, BoxComponent, TextComponent, SeparatorComponent
+    from linebot.models import TextSendMessage, FlexSendMessage, BubbleContainer, BoxComponent, TextComponent, SeparatorComponent, CarouselContainer
     from linebot.exceptions import LineBotApiError
     LINE_AVAILABLE = True
 except ImportError:
     print("⚠️ LINE Bot SDK not available. Install with: pip install line-bot-sdk")
     LINE_AVAILABLE = False
 
+# NumPy is optional: alert analysis vectorizes with it, else falls back to lists
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 # Load environment variables
 try:
     from load_env import load_env_file, get_config_dict
@@ -34,37 +59,146 @@ try:
 except ImportError:
     config = {}
 
-# Setup logger - will be configured when logging is properly initialized
-logger = None
+logger = logging.getLogger(__name__)
 
+# Kept for modules that import these helpers; they forward to logger directly
 def get_logger():
-    """Get logger instance, creating if needed"""
-    global logger
-    if logger is None:
-        import logging
-        logger = logging.getLogger(__name__)
+    """Get logger instance"""
     return logger
 
 def log_info(message):
     """Safe logging info"""
-    try:
-        get_logger().info(message)
-    except:
-        print("INFO: {}".format(message))
+    logger.info(message)
 
 def log_warning(message):
     """Safe logging warning"""
-    try:
-        get_logger().warning(message)
-    except:
-        print("WARNING: {}".format(message))
+    logger.warning(message)
 
 def log_error(message):
     """Safe logging error"""
-    try:
-        get_logger().error(message)
-    except:
-        print("ERROR: {}".format(message))
+    logger.error(message)
+
+# LINE Messaging API limits: messages per request, user IDs per multicast
+_LINE_MAX_MESSAGES = 5
+_LINE_MAX_RECIPIENTS = 500
+# Attempts and base backoff (seconds, doubled per retry) on HTTP 429
+_LINE_MAX_ATTEMPTS = 3
+_LINE_RETRY_DELAY = 1.0
+# LINE alert layout; parsed once at import instead of an f-string per message
+_LINE_TMPL = string.Template(
+    "$emoji $header\n\n"
+    "🕒 Time: $ts\n"
+    "🖥️ System: One Climate Infrastructure\n"
+    "📊 Level: $level\n\n"
+    "$body\n\n"
+    "$footer"
+)
+# Text messages cap at 5000 chars; longer alerts go out as a Flex carousel
+# of up to 12 bubbles with 30 lines each
+_LINE_FLEX_THRESHOLD = 4000
+_LINE_FLEX_LINES_PER_BUBBLE = 30
+_LINE_FLEX_MAX_BUBBLES = 12
+
+# Alert systems holding an open SMTP session; QUIT them at interpreter exit
+_SMTP_CLIENTS = weakref.WeakSet()
+
+def _close_smtp_clients():
+    """Close any persistent SMTP sessions still open at shutdown"""
+    for alert_system in list(_SMTP_CLIENTS):
+        alert_system.close()
+
+atexit.register(_close_smtp_clients)
+
+# Warning alerts kept in full; the rest are only counted (warning_overflow)
+_MAX_WARNING_DETAILS = 5
+
+# (label, vm_data key) for each metric checked by analyze_vm_alerts
+_ALERT_METRICS = (('CPU', 'cpu_load'), ('Memory', 'memory_used'), ('Disk', 'disk_used'))
+
+# Alert message templates, bound once; only formatted for alerting VMs
+_OFFLINE_MSG = "{} is OFFLINE".format
+_WARNING_MSG = "{}: {} {:.1f}% (Warning)".format
+_CRITICAL_MSG = "{}: {} {:.1f}% (Critical)".format
+
+def _vm_data_to_soa(vm_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Column (struct-of-arrays) view of vm_data: names, online mask, metrics"""
+    n = len(vm_data)
+    soa = {'names': [vm.get('name', 'Unknown VM') for vm in vm_data]}
+    if NUMPY_AVAILABLE:
+        soa['is_online'] = np.fromiter((bool(vm.get('is_online', False)) for vm in vm_data), dtype=bool, count=n)
+        for _, key in _ALERT_METRICS:
+            soa[key] = np.fromiter((vm.get(key) or 0 for vm in vm_data), dtype=np.float64, count=n)
+    else:
+        soa['is_online'] = [bool(vm.get('is_online', False)) for vm in vm_data]
+        for _, key in _ALERT_METRICS:
+            soa[key] = [vm.get(key) or 0 for vm in vm_data]
+    return soa
+
+def _classify_soa(soa: Dict[str, Any], thresholds) -> tuple:
+    """Per-metric alert levels over the SoA columns
+    
+    Returns (offline_idx, alert_idx, healthy_idx, levels): index lists in
+    vm_data order, and one column per metric holding 0 (ok), 1 (warning) or
+    2 (critical) for each VM; offline VMs are always 0.
+    """
+    online = soa['is_online']
+    if NUMPY_AVAILABLE:
+        levels = []
+        for (_, key), (warn, crit) in zip(_ALERT_METRICS, thresholds):
+            # Explicit >= masks so NaN compares False (healthy), as in the list path
+            values = soa[key]
+            is_crit = values >= crit
+            is_warn = (values >= warn) & ~is_crit
+            levels.append((is_crit * 2 + is_warn) * online)
+        tripped = np.vstack(levels).any(axis=0)
+        return (
+            np.flatnonzero(~online).tolist(),
+            np.flatnonzero(tripped).tolist(),
+            np.flatnonzero(online & ~tripped).tolist(),
+            levels
+        )
+    
+    levels = [[(2 if value >= crit else 1 if value >= warn else 0) if is_on else 0
+               for is_on, value in zip(online, soa[key])]
+              for (_, key), (warn, crit) in zip(_ALERT_METRICS, thresholds)]
+    tripped = [any(metric_levels) for metric_levels in zip(*levels)]
+    return (
+        [i for i, is_on in enumerate(online) if not is_on],
+        [i for i, hit in enumerate(tripped) if hit],
+        [i for i, (is_on, hit) in enumerate(zip(online, tripped)) if is_on and not hit],
+        levels
+    )
+
+def _ts(now_str: str = None) -> str:
+    """Return the run timestamp handed down by the caller, or format the current time"""
+    if now_str is not None:
+        return now_str
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+# PDFs larger than this are encoded per send instead of being held in the cache
+_PDF_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+def _build_pdf_part(path: str) -> MIMEApplication:
+    """Read a PDF and wrap it as a base64-encoded attachment part"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size:
+            # Encode straight from the page cache; no bytes copy of the file
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as pdf_data:
+                attachment = MIMEApplication(pdf_data, 'pdf')
+        else:
+            attachment = MIMEApplication(f.read(), 'pdf')
+    
+    attachment.add_header(
+        'Content-Disposition',
+        'attachment',
+        filename=Path(path).name
+    )
+    return attachment
+
+@functools.lru_cache(maxsize=2)
+def _load_pdf_part(path: str, mtime: float, size: int) -> MIMEApplication:
+    """Cached attachment part; mtime/size in the key invalidate on rewrite"""
+    return _build_pdf_part(path)
 
 class AlertLevel(Enum):
     """Alert severity levels"""
@@ -72,6 +206,23 @@ class AlertLevel(Enum):
     WARNING = "warning"
     CRITICAL = "critical"
     EMERGENCY = "emergency"
+    
+    def __init__(self, value):
+        # Resolved once per member so formatters index instead of re-deriving
+        self.label = value.upper()
+
+# Definition order, assigned once the class exists; indexes the tables below
+for _ordinal, _level in enumerate(AlertLevel):
+    _level.ordinal = _ordinal
+del _ordinal, _level
+
+# LINE emoji per AlertLevel, indexed by AlertLevel.ordinal
+_EMOJI_BY_ORD = ("ℹ️", "⚠️", "🚨", "🔥")
+
+# Email (X-Priority, X-MSMail-Priority, Importance) per AlertLevel.ordinal
+_NORMAL_PRIORITY = ('3', 'Normal', 'Normal')
+_HIGH_PRIORITY = ('1', 'High', 'High')
+_PRIORITY_HEADERS_BY_ORD = (_NORMAL_PRIORITY, _NORMAL_PRIORITY, _HIGH_PRIORITY, _HIGH_PRIORITY)
 
 class AlertChannel(Enum):
     """Available alert channels"""
@@ -80,9 +231,9 @@ class AlertChannel(Enum):
     SLACK = "slack"
     TEAMS = "teams"
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AlertConfig:
-    """Alert system configuration"""
+    """Alert system configuration (read-only once constructed)"""
     # Email settings
     smtp_server: str = "smtp.gmail.com"
     smtp_port: int = 587
@@ -90,13 +241,14 @@ class AlertConfig:
     email_password: str = ""
     sender_email: str = ""
     sender_name: str = "VM Monitoring System"
-    to_emails: List[str] = None
-    cc_emails: List[str] = None
-    bcc_emails: List[str] = None
+    to_emails: List[str] = field(default_factory=list)
+    cc_emails: List[str] = field(default_factory=list)
+    bcc_emails: List[str] = field(default_factory=list)
     
     # LINE settings
     line_channel_access_token: str = ""
     line_user_id: str = ""
+    line_user_ids: List[str] = field(default_factory=list)  # Multicast recipients; falls back to line_user_id
     line_notifications_enabled: bool = False  # Temporarily disabled
     
     # Alert thresholds
@@ -108,176 +260,227 @@ class AlertConfig:
     disk_critical_threshold: float = 90.0
     
     # Channel preferences
-    info_channels: List[AlertChannel] = None
-    warning_channels: List[AlertChannel] = None
-    critical_channels: List[AlertChannel] = None
-    emergency_channels: List[AlertChannel] = None
-    
-    def __post_init__(self):
-        if self.to_emails is None:
-            self.to_emails = []
-        if self.info_channels is None:
-            self.info_channels = [AlertChannel.EMAIL]
-        if self.warning_channels is None:
-            self.warning_channels = [AlertChannel.EMAIL, AlertChannel.LINE]
-        if self.critical_channels is None:
-            self.critical_channels = [AlertChannel.EMAIL, AlertChannel.LINE]
-        if self.emergency_channels is None:
-            self.emergency_channels = [AlertChannel.EMAIL, AlertChannel.LINE]
+    info_channels: List[AlertChannel] = field(default_factory=lambda: [AlertChannel.EMAIL])
+    warning_channels: List[AlertChannel] = field(default_factory=lambda: [AlertChannel.EMAIL, AlertChannel.LINE])
+    critical_channels: List[AlertChannel] = field(default_factory=lambda: [AlertChannel.EMAIL, AlertChannel.LINE])
+    emergency_channels: List[AlertChannel] = field(default_factory=lambda: [AlertChannel.EMAIL, AlertChannel.LINE])
+
+# Environment variables that make up an AlertConfig
+_CONFIG_ENV_KEYS = (
+    'SMTP_SERVER', 'SMTP_PORT', 'EMAIL_USERNAME', 'EMAIL_PASSWORD',
+    'SENDER_EMAIL', 'SENDER_NAME', 'TO_EMAILS', 'CC_EMAILS', 'BCC_EMAILS',
+    'LINE_CHANNEL_ACCESS_TOKEN', 'LINE_USER_ID', 'LINE_USER_IDS', 'LINE_NOTIFICATIONS_ENABLED',
+    'CPU_WARNING_THRESHOLD', 'CPU_CRITICAL_THRESHOLD',
+    'MEMORY_WARNING_THRESHOLD', 'MEMORY_CRITICAL_THRESHOLD',
+    'DISK_WARNING_THRESHOLD', 'DISK_CRITICAL_THRESHOLD',
+)
+
+@functools.lru_cache(maxsize=1)
+def _config_from_env(env_values: tuple) -> AlertConfig:
+    """Parse AlertConfig from _CONFIG_ENV_KEYS values (None = unset)
+    
+    Memoized on the raw values, so repeated EnhancedAlertSystem() calls skip
+    re-splitting recipient lists and re-parsing numbers while env is unchanged.
+    """
+    env = {key: value for key, value in zip(_CONFIG_ENV_KEYS, env_values) if value is not None}
+    
+    to_emails_str = env.get('TO_EMAILS', '')
+    to_emails = [email.strip() for email in to_emails_str.split(',') if email.strip()]
+    
+    cc_emails_str = env.get('CC_EMAILS', '')
+    cc_emails = [email.strip() for email in cc_emails_str.split(',') if email.strip()]
+    
+    bcc_emails_str = env.get('BCC_EMAILS', '')
+    bcc_emails = [email.strip() for email in bcc_emails_str.split(',') if email.strip()]
+    
+    line_user_ids_str = env.get('LINE_USER_IDS', '')
+    line_user_ids = [user_id.strip() for user_id in line_user_ids_str.split(',') if user_id.strip()]
+    
+    return AlertConfig(
+        smtp_server=env.get('SMTP_SERVER', 'smtp.gmail.com'),
+        smtp_port=int(env.get('SMTP_PORT', '587')),
+        email_username=env.get('EMAIL_USERNAME', ''),
+        email_password=env.get('EMAIL_PASSWORD', ''),
+        sender_email=env.get('SENDER_EMAIL', ''),
+        sender_name=env.get('SENDER_NAME', 'VM Monitoring System'),
+        to_emails=to_emails,
+        cc_emails=cc_emails,
+        bcc_emails=bcc_emails,
+        line_channel_access_token=env.get('LINE_CHANNEL_ACCESS_TOKEN', ''),
+        line_user_id=env.get('LINE_USER_ID', ''),
+        line_user_ids=line_user_ids,
+        line_notifications_enabled=env.get('LINE_NOTIFICATIONS_ENABLED', 'false').lower() == 'true',
+        cpu_warning_threshold=float(env.get('CPU_WARNING_THRESHOLD', '70')),
+        cpu_critical_threshold=float(env.get('CPU_CRITICAL_THRESHOLD', '85')),
+        memory_warning_threshold=float(env.get('MEMORY_WARNING_THRESHOLD', '75')),
+        memory_critical_threshold=float(env.get('MEMORY_CRITICAL_THRESHOLD', '90')),
+        disk_warning_threshold=float(env.get('DISK_WARNING_THRESHOLD', '80')),
+        disk_critical_threshold=float(env.get('DISK_CRITICAL_THRESHOLD', '90'))
+    )
+
+@dataclass(slots=True)
+class AlertBuckets:
+    """Result of analyze_vm_alerts: alert lists per bucket plus their counts
+    
+    counts is (critical, warning, offline, healthy). Only the first five
+    warnings are kept; warning_overflow counts the ones dropped, and counts
+    includes them. Item access and get() are kept for callers that still
+    treat the result as a dict.
+    """
+    critical: List[Dict[str, Any]] = field(default_factory=list)
+    warning: List[Dict[str, Any]] = field(default_factory=list)
+    offline: List[Dict[str, Any]] = field(default_factory=list)
+    healthy: List[str] = field(default_factory=list)
+    power_changes: List[Dict[str, Any]] = field(default_factory=list)
+    warning_overflow: int = 0
+    counts: Tuple[int, int, int, int] = (0, 0, 0, 0)
+    
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+def _dedup_ttl_from_env(default: int = 3600) -> int:
+    """ALERT_DEDUP_TTL in seconds; blank or invalid values fall back to the default"""
+    raw = (os.getenv('ALERT_DEDUP_TTL') or '').strip()
+    if not raw:
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        logger.warning("⚠️ Invalid ALERT_DEDUP_TTL %r - using %ss", raw, default)
+        return default
+
+@dataclass(frozen=True, slots=True)
+class RenderedAlert:
+    """Alert content rendered once per run and shared by every channel"""
+    timestamp: str
+    level: AlertLevel
+    body: str
+    line_body: str
+    subject: str
 
 class EnhancedAlertSystem:
     """Enhanced multi-channel alert system - WORKING VERSION"""
     
+    # (channel, delivered alert fingerprint) -> (first_sent_ts, dedup_count),
+    # shared by all instances so repeat runs within the TTL don't re-send
+    # identical alerts through a channel that already delivered them
+    _dedup_cache: Dict[tuple, tuple] = {}
+    _dedup_lock = threading.Lock()
+    _dedup_ttl = _dedup_ttl_from_env()
+    _dedup_maxsize = 10_000
+    
     def __init__(self, config: AlertConfig = None):
         self.config = config or self._load_config_from_env()
         self.line_bot_api = None
         self._setup_line_bot()
+        self._line_recipients = list(self.config.line_user_ids) or (
+            [self.config.line_user_id] if self.config.line_user_id else []
+        )
+        
+        # Persistent SMTP session, created on first send and reused after
+        self._smtp = None
+        self._smtp_lock = threading.Lock()
+        
+        # Background workers for fast-ACK callers, created on first async send
+        # so sync and one-shot instances never own a pool
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        
+        # Static message blocks, rendered once rather than per message
+        self._footer = "---\nVM Monitoring System\nOne Climate Infrastructure"
+        self._line_footer = "---\nVM Monitoring System"
+        self._line_header_prefix = "VM Infrastructure Alert"
         
     def _load_config_from_env(self) -> AlertConfig:
         """Load configuration from environment variables"""
-        to_emails_str = os.getenv('TO_EMAILS', '')
-        to_emails = [email.strip() for email in to_emails_str.split(',') if email.strip()]
-        
-        cc_emails_str = os.getenv('CC_EMAILS', '')
-        cc_emails = [email.strip() for email in cc_emails_str.split(',') if email.strip()]
-        
-        bcc_emails_str = os.getenv('BCC_EMAILS', '')
-        bcc_emails = [email.strip() for email in bcc_emails_str.split(',') if email.strip()]
-        
-        return AlertConfig(
-            smtp_server=os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
-            smtp_port=int(os.getenv('SMTP_PORT', '587')),
-            email_username=os.getenv('EMAIL_USERNAME', ''),
-            email_password=os.getenv('EMAIL_PASSWORD', ''),
-            sender_email=os.getenv('SENDER_EMAIL', ''),
-            sender_name=os.getenv('SENDER_NAME', 'VM Monitoring System'),
-            to_emails=to_emails,
-            cc_emails=cc_emails,
-            bcc_emails=bcc_emails,
-            line_channel_access_token=os.getenv('LINE_CHANNEL_ACCESS_TOKEN', ''),
-            line_user_id=os.getenv('LINE_USER_ID', ''),
-            line_notifications_enabled=os.getenv('LINE_NOTIFICATIONS_ENABLED', 'false').lower() == 'true',
-            cpu_warning_threshold=float(os.getenv('CPU_WARNING_THRESHOLD', '70')),
-            cpu_critical_threshold=float(os.getenv('CPU_CRITICAL_THRESHOLD', '85')),
-            memory_warning_threshold=float(os.getenv('MEMORY_WARNING_THRESHOLD', '75')),
-            memory_critical_threshold=float(os.getenv('MEMORY_CRITICAL_THRESHOLD', '90')),
-            disk_warning_threshold=float(os.getenv('DISK_WARNING_THRESHOLD', '80')),
-            disk_critical_threshold=float(os.getenv('DISK_CRITICAL_THRESHOLD', '90'))
-        )
+        return _config_from_env(tuple(os.getenv(key) for key in _CONFIG_ENV_KEYS))
     
     def _setup_line_bot(self):
         """Initialize LINE Bot API"""
         if not LINE_AVAILABLE:
-            log_warning("LINE Bot SDK not available")
+            logger.warning("LINE Bot SDK not available")
             return
             
         if self.config.line_channel_access_token:
             try:
                 self.line_bot_api = LineBotApi(self.config.line_channel_access_token)
-                log_info("✅ LINE Bot API initialized successfully")
+                logger.info("✅ LINE Bot API initialized successfully")
             except Exception as e:
-                log_error("❌ Failed to initialize LINE Bot API: {}".format(e))
+                logger.error("❌ Failed to initialize LINE Bot API: %s", e)
                 self.line_bot_api = None
         else:
-            log_warning("⚠️ LINE_CHANNEL_ACCESS_TOKEN not configured")
+            logger.warning("⚠️ LINE_CHANNEL_ACCESS_TOKEN not configured")
     
-    def analyze_vm_alerts(self, vm_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def analyze_vm_alerts(self, vm_data: List[Dict[str, Any]]) -> AlertBuckets:
         """Analyze VM data and generate alerts including power state changes"""
-        alerts = {
-            'critical': [],
-            'warning': [],
-            'offline': [],
-            'healthy': [],
-            'power_changes': []  # New: Power state change alerts
-        }
+        # Thresholds are loop-invariant; read them off the config once
+        cpu_warn = self.config.cpu_warning_threshold
+        cpu_crit = self.config.cpu_critical_threshold
+        mem_warn = self.config.memory_warning_threshold
+        mem_crit = self.config.memory_critical_threshold
+        disk_warn = self.config.disk_warning_threshold
+        disk_crit = self.config.disk_critical_threshold
         
-        for vm in vm_data:
-            vm_name = vm.get('name', 'Unknown VM')
-            is_online = vm.get('is_online', False)
-            
-            if not is_online:
-                alerts['offline'].append({
-                    'vm': vm_name,
-                    'message': "{} is OFFLINE".format(vm_name),
-                    'level': AlertLevel.CRITICAL
-                })
-                continue
-            
-            # Check CPU
-            cpu = vm.get('cpu_load', 0)
-            if cpu >= self.config.cpu_critical_threshold:
-                alerts['critical'].append({
-                    'vm': vm_name,
-                    'metric': 'CPU',
-                    'value': cpu,
-                    'threshold': self.config.cpu_critical_threshold,
-                    'message': "{}: CPU {:.1f}% (Critical)".format(vm_name, cpu),
-                    'level': AlertLevel.CRITICAL
-                })
-            elif cpu >= self.config.cpu_warning_threshold:
-                alerts['warning'].append({
-                    'vm': vm_name,
-                    'metric': 'CPU',
-                    'value': cpu,
-                    'threshold': self.config.cpu_warning_threshold,
-                    'message': "{}: CPU {:.1f}% (Warning)".format(vm_name, cpu),
-                    'level': AlertLevel.WARNING
-                })
-            
-            # Check Memory
-            memory = vm.get('memory_used', 0)
-            if memory >= self.config.memory_critical_threshold:
-                alerts['critical'].append({
-                    'vm': vm_name,
-                    'metric': 'Memory',
-                    'value': memory,
-                    'threshold': self.config.memory_critical_threshold,
-                    'message': "{}: Memory {:.1f}% (Critical)".format(vm_name, memory),
-                    'level': AlertLevel.CRITICAL
-                })
-            elif memory >= self.config.memory_warning_threshold:
-                alerts['warning'].append({
-                    'vm': vm_name,
-                    'metric': 'Memory',
-                    'value': memory,
-                    'threshold': self.config.memory_warning_threshold,
-                    'message': "{}: Memory {:.1f}% (Warning)".format(vm_name, memory),
-                    'level': AlertLevel.WARNING
-                })
-            
-            # Check Disk
-            disk = vm.get('disk_used', 0)
-            if disk >= self.config.disk_critical_threshold:
-                alerts['critical'].append({
-                    'vm': vm_name,
-                    'metric': 'Disk',
-                    'value': disk,
-                    'threshold': self.config.disk_critical_threshold,
-                    'message': "{}: Disk {:.1f}% (Critical)".format(vm_name, disk),
-                    'level': AlertLevel.CRITICAL
-                })
-            elif disk >= self.config.disk_warning_threshold:
-                alerts['warning'].append({
+        alerts = AlertBuckets()
+        offline = alerts.offline
+        buckets = {'warning': alerts.warning, 'critical': alerts.critical}
+        
+        # Bucket whole metric columns at once; Python-level work (dicts and
+        # message strings) is only done for VMs that are offline or alerting
+        soa = _vm_data_to_soa(vm_data)
+        names = soa['names']
+        thresholds = ((cpu_warn, cpu_crit), (mem_warn, mem_crit), (disk_warn, disk_crit))
+        offline_idx, alert_idx, healthy_idx, levels = _classify_soa(soa, thresholds)
+        
+        for i in offline_idx:
+            offline.append({
+                'vm': names[i],
+                'message': _OFFLINE_MSG(names[i]),
+                'level': AlertLevel.CRITICAL
+            })
+        
+        # Level 1/2 -> (bucket, AlertLevel, threshold index, message template)
+        level_table = (
+            None,
+            ('warning', AlertLevel.WARNING, 0, _WARNING_MSG),
+            ('critical', AlertLevel.CRITICAL, 1, _CRITICAL_MSG)
+        )
+        for i in alert_idx:
+            vm_name = names[i]
+            for m, (metric, key) in enumerate(_ALERT_METRICS):
+                level = levels[m][i]
+                if not level:
+                    continue
+                bucket, alert_level, threshold_index, template = level_table[level]
+                if level == 1 and len(alerts.warning) >= _MAX_WARNING_DETAILS:
+                    alerts.warning_overflow += 1
+                    continue
+                value = vm_data[i].get(key) or 0
+                buckets[bucket].append({
                     'vm': vm_name,
-                    'metric': 'Disk',
-                    'value': disk,
-                    'threshold': self.config.disk_warning_threshold,
-                    'message': "{}: Disk {:.1f}% (Warning)".format(vm_name, disk),
-                    'level': AlertLevel.WARNING
+                    'metric': metric,
+                    'value': value,
+                    'threshold': thresholds[m][threshold_index],
+                    'message': template(vm_name, metric, value),
+                    'level': alert_level
                 })
-            
-            # If no alerts, mark as healthy
-            if not any([
-                cpu >= self.config.cpu_warning_threshold,
-                memory >= self.config.memory_warning_threshold,
-                disk >= self.config.disk_warning_threshold
-            ]):
-                alerts['healthy'].append(vm_name)
+        
+        # VMs with no alerts are healthy
+        alerts.healthy = [names[i] for i in healthy_idx]
         
         # Check for power state changes in any VM
         power_changes = self._extract_power_changes(vm_data)
         if power_changes:
-            alerts['power_changes'] = power_changes
+            alerts.power_changes = power_changes
+        
+        alerts.counts = (len(alerts.critical), len(alerts.warning) + alerts.warning_overflow,
+                         len(alerts.offline), len(alerts.healthy))
         
         return alerts
     
@@ -313,23 +516,34 @@ class EnhancedAlertSystem:
         if not power_changes:
             return True
         
+        # Drop repeats of the same VM event within one minute (flapping VMs)
+        seen = set()
+        unique_changes = []
+        for change in power_changes:
+            key = (change.get('vm_name'), change.get('type'), str(change.get('timestamp', ''))[:16])
+            if key in seen:
+                continue
+            seen.add(key)
+            unique_changes.append(change)
+        
+        if len(unique_changes) < len(power_changes):
+            logger.info("🔄 Skipped %s duplicate power change alerts", len(power_changes) - len(unique_changes))
+        power_changes = unique_changes
+        
         # Limit power change alerts to avoid rate limiting
         max_alerts = 5  # Limit to 5 alerts to avoid LINE rate limits
         limited_changes = power_changes[:max_alerts]
         
-        success_count = 0
         total_alerts = len(limited_changes)
         
         if len(power_changes) > max_alerts:
-            log_info("🔄 Limiting power change alerts to {} out of {} to avoid rate limits".format(max_alerts, len(power_changes)))
+            logger.info("🔄 Limiting power change alerts to %s out of %s to avoid rate limits", max_alerts, len(power_changes))
         
-        for change in limited_changes:
-            # Send LINE notification for each change
-            line_message = self._format_power_change_line_message(change)
-            if self.send_line_alert(line_message, AlertLevel.INFO):
-                success_count += 1
+        # All changes go out as one batched LINE request
+        line_messages = [self._format_power_change_line_message(change) for change in limited_changes]
+        success_count = total_alerts if self.send_line_alerts(line_messages, AlertLevel.INFO) else 0
         
-        log_info("🔄 Sent {}/{} power change alerts (limited from {})".format(success_count, total_alerts, len(power_changes)))
+        logger.info("🔄 Sent %s/%s power change alerts (limited from %s)", success_count, total_alerts, len(power_changes))
         return success_count == total_alerts
     
     def _format_power_change_line_message(self, change: Dict[str, Any]) -> str:
@@ -357,62 +571,98 @@ class EnhancedAlertSystem:
         
         return message
     
-    def send_line_alert(self, message: str, alert_level: AlertLevel = AlertLevel.INFO) -> bool:
+    def send_line_alert(self, message: str, alert_level: AlertLevel = AlertLevel.INFO,
+                        current_time: str = None) -> bool:
         """Send alert to LINE OA with enhanced formatting"""
+        return self.send_line_alerts([message], alert_level, current_time)
+    
+    def send_line_alerts(self, messages: List[str], alert_level: AlertLevel = AlertLevel.INFO,
+                         current_time: str = None) -> bool:
+        """Send alerts to all LINE recipients in as few API requests as possible"""
         # Check if LINE notifications are disabled
         if not self.config.line_notifications_enabled:
-            log_info("📱 LINE notifications disabled - skipping LINE alert")
+            logger.info("📱 LINE notifications disabled - skipping LINE alert")
             return True  # Return True to indicate successful "skipping"
             
-        if not self.line_bot_api or not self.config.line_user_id:
-            log_warning("⚠️ LINE Bot not configured")
+        if not self.line_bot_api or not self._line_recipients:
+            logger.warning("⚠️ LINE Bot not configured")
             return False
         
         try:
             # Create enhanced LINE message with emoji and formatting
-            emoji_map = {
-                AlertLevel.INFO: "ℹ️",
-                AlertLevel.WARNING: "⚠️",
-                AlertLevel.CRITICAL: "🚨",
-                AlertLevel.EMERGENCY: "🔥"
-            }
+            emoji = _EMOJI_BY_ORD[alert_level.ordinal]
+            current_time = _ts(current_time)
             
-            emoji = emoji_map.get(alert_level, "📢")
-            current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-            formatted_message = f"""{emoji} VM Infrastructure Alert
-
-🕒 Time: {current_time}
-🖥️ System: One Climate Infrastructure
-📊 Level: {alert_level.value.upper()}
-
-{message}
-
----
-VM Monitoring System"""
+            text_messages = []
+            for message in messages:
+                formatted_message = _LINE_TMPL.substitute(
+                    emoji=emoji, header=self._line_header_prefix, ts=current_time,
+                    level=alert_level.label, body=message, footer=self._line_footer
+                )
+                if len(formatted_message) > _LINE_FLEX_THRESHOLD:
+                    alt_text = "{} {} ({})".format(emoji, self._line_header_prefix, alert_level.label)
+                    text_messages.append(self._build_line_carousel(formatted_message, alt_text))
+                else:
+                    text_messages.append(TextSendMessage(text=formatted_message))
             
-            # Send text message
-            self.line_bot_api.push_message(
-                self.config.line_user_id,
-                TextSendMessage(text=formatted_message)
-            )
+            # Send text messages, up to 5 per request
+            for start in range(0, len(text_messages), _LINE_MAX_MESSAGES):
+                self._push_line_messages(text_messages[start:start + _LINE_MAX_MESSAGES])
             
-            log_info("✅ LINE alert sent successfully ({})".format(alert_level.value))
+            logger.info("✅ LINE alert sent successfully (%s)", alert_level.value)
             return True
             
         except LineBotApiError as e:
-            log_error("❌ LINE Bot API error: {}".format(e))
+            logger.error("❌ LINE Bot API error: %s", e)
             return False
         except Exception as e:
-            log_error("❌ Failed to send LINE alert: {}".format(e))
+            logger.error("❌ Failed to send LINE alert: %s", e)
             return False
     
+    @staticmethod
+    def _build_line_carousel(formatted_message: str, alt_text: str):
+        """Paginate a long alert into a Flex carousel, one bubble per 30 lines"""
+        # Flex text components must not be empty, so blank lines become a space
+        lines = [line or ' ' for line in formatted_message.splitlines()]
+        bubbles = []
+        for start in range(0, len(lines), _LINE_FLEX_LINES_PER_BUBBLE):
+            if len(bubbles) == _LINE_FLEX_MAX_BUBBLES:
+                logger.warning("⚠️ LINE alert truncated to %s pages", _LINE_FLEX_MAX_BUBBLES)
+                break
+            page = lines[start:start + _LINE_FLEX_LINES_PER_BUBBLE]
+            bubbles.append(BubbleContainer(body=BoxComponent(
+                layout='vertical',
+                contents=[TextComponent(text=line, size='xs', wrap=True) for line in page]
+            )))
+        return FlexSendMessage(alt_text=alt_text, contents=CarouselContainer(contents=bubbles))
+    
+    def _push_line_messages(self, line_messages: list):
+        """Deliver messages to every recipient, one multicast per 500 users
+        
+        Retries with exponential backoff when LINE answers 429 (rate limited).
+        """
+        for start in range(0, len(self._line_recipients), _LINE_MAX_RECIPIENTS):
+            recipients = self._line_recipients[start:start + _LINE_MAX_RECIPIENTS]
+            for attempt in range(_LINE_MAX_ATTEMPTS):
+                try:
+                    if len(recipients) == 1:
+                        self.line_bot_api.push_message(recipients[0], line_messages)
+                    else:
+                        self.line_bot_api.multicast(recipients, line_messages)
+                    break
+                except LineBotApiError as e:
+                    if getattr(e, 'status_code', None) != 429 or attempt == _LINE_MAX_ATTEMPTS - 1:
+                        raise
+                    delay = _LINE_RETRY_DELAY * 2 ** attempt
+                    logger.warning("⚠️ LINE rate limited, retrying in %.0fs", delay)
+                    time.sleep(delay)
+    
     def send_email_alert(self, subject: str, body: str, alert_level: AlertLevel = AlertLevel.INFO, 
                         pdf_path: str = None) -> bool:
         """Send email alert with enhanced formatting"""
         try:
             if not self.config.to_emails and not self.config.cc_emails and not self.config.bcc_emails:
-                log_warning("⚠️ No email recipients configured")
+                logger.warning("⚠️ No email recipients configured")
                 return False
             
             # Create message
@@ -431,19 +681,16 @@ VM Monitoring System"""
             
             # Add anti-spam headers
             msg['Reply-To'] = self.config.sender_email
-            msg['Message-ID'] = "<{}.{}@one-climate.monitoring>".format(datetime.now().strftime('%Y%m%d%H%M%S'), hash(subject))
+            msg['Message-ID'] = make_msgid(domain='one-climate.monitoring')
+            msg['Date'] = formatdate(localtime=True)
             msg['X-Mailer'] = 'One Climate VM Monitoring System v2.0'
             msg['List-Unsubscribe'] = '<mailto:{}?subject=Unsubscribe>'.format(self.config.sender_email)
             
             # Add priority based on alert level
-            if alert_level in [AlertLevel.CRITICAL, AlertLevel.EMERGENCY]:
-                msg['X-Priority'] = '1'
-                msg['X-MSMail-Priority'] = 'High'
-                msg['Importance'] = 'High'
-            else:
-                msg['X-Priority'] = '3'
-                msg['X-MSMail-Priority'] = 'Normal'
-                msg['Importance'] = 'Normal'
+            priority, ms_priority, importance = _PRIORITY_HEADERS_BY_ORD[alert_level.ordinal]
+            msg['X-Priority'] = priority
+            msg['X-MSMail-Priority'] = ms_priority
+            msg['Importance'] = importance
             
             # Add body
             msg.attach(MIMEText(body, 'plain', 'utf-8'))
@@ -451,19 +698,16 @@ VM Monitoring System"""
             # Add PDF attachment if provided
             if pdf_path and Path(pdf_path).exists():
                 try:
-                    with open(pdf_path, 'rb') as f:
-                        pdf_data = f.read()
-                    
-                    attachment = MIMEApplication(pdf_data, 'pdf')
-                    attachment.add_header(
-                        'Content-Disposition',
-                        'attachment',
-                        filename=Path(pdf_path).name
-                    )
+                    # Repeat sends of the same daily PDF reuse the encoded part
+                    st = os.stat(pdf_path)
+                    if st.st_size > _PDF_CACHE_MAX_BYTES:
+                        attachment = _build_pdf_part(str(pdf_path))
+                    else:
+                        attachment = _load_pdf_part(str(pdf_path), st.st_mtime, st.st_size)
                     msg.attach(attachment)
-                    log_info("📎 PDF attached: {}".format(Path(pdf_path).name))
+                    logger.info("📎 PDF attached: %s", Path(pdf_path).name)
                 except Exception as e:
-                    log_warning("⚠️ Failed to attach PDF: {}".format(e))
+                    logger.warning("⚠️ Failed to attach PDF: %s", e)
             
             # Send email with proper Gmail SMTP configuration
             try:
@@ -476,24 +720,84 @@ VM Monitoring System"""
                 if self.config.bcc_emails:
                     all_recipients.extend(self.config.bcc_emails)
                 
-                with smtplib.SMTP(self.config.smtp_server, self.config.smtp_port, timeout=30) as server:
-                    # Enable TLS encryption
-                    server.starttls()
-                    server.login(self.config.email_username, self.config.email_password)
-                    # Send to all recipients (TO, CC, BCC)
-                    server.sendmail(self.config.sender_email, all_recipients, msg.as_string())
+                # Flatten once, straight to CRLF bytes (no as_string() str->bytes
+                # re-encode); a reconnect-and-retry resends the same payload
+                raw_message = msg.as_bytes(policy=msg.policy.clone(linesep='\r\n'))
+                
+                with self._smtp_lock:
+                    server = self._get_smtp()
+                    try:
+                        # Send to all recipients (TO, CC, BCC) in one transaction
+                        server.sendmail(self.config.sender_email, all_recipients, raw_message)
+                    except smtplib.SMTPServerDisconnected:
+                        # Server dropped the idle session; reconnect once and retry
+                        self._smtp = None
+                        server = self._get_smtp()
+                        server.sendmail(self.config.sender_email, all_recipients, raw_message)
                 
-                log_info("✅ Email alert sent successfully ({}) to {} recipients".format(alert_level.value, len(all_recipients)))
+                logger.info("✅ Email alert sent successfully (%s) to %s recipients", alert_level.value, len(all_recipients))
                 return True
                 
             except Exception as e:
-                log_warning("⚠️ Email sending failed: {}".format(e))
+                logger.warning("⚠️ Email sending failed: %s", e)
                 return False
             
         except Exception as e:
-            log_warning("⚠️ Email system error: {}".format(e))
+            logger.warning("⚠️ Email system error: %s", e)
             return False
     
+    def _get_smtp(self) -> smtplib.SMTP:
+        """Return a live SMTP session, connecting (STARTTLS + LOGIN) if needed
+        
+        Caller must hold self._smtp_lock.
+        """
+        if self._smtp is not None:
+            try:
+                self._smtp.noop()
+                return self._smtp
+            except (smtplib.SMTPException, OSError):
+                self._close_smtp()
+        
+        server = smtplib.SMTP(self.config.smtp_server, self.config.smtp_port, timeout=30)
+        try:
+            # Enable TLS encryption
+            server.starttls()
+            server.login(self.config.email_username, self.config.email_password)
+        except Exception:
+            server.close()
+            raise
+        
+        self._smtp = server
+        _SMTP_CLIENTS.add(self)
+        return server
+    
+    def _close_smtp(self):
+        """Drop the persistent SMTP session (QUIT, falling back to close)"""
+        server, self._smtp = self._smtp, None
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Return the background alert workers, creating them on first use"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='alert')
+            return self._executor
+    
+    def close(self):
+        """Finish queued async sends, then release the persistent SMTP connection"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        with self._smtp_lock:
+            self._close_smtp()
+        _SMTP_CLIENTS.discard(self)
+    
     def send_comprehensive_alert(self, vm_data: List[Dict[str, Any]], summary: Dict[str, Any], 
                                 pdf_path: str = None) -> Dict[str, bool]:
         """Send comprehensive alerts through all configured channels"""
@@ -503,19 +807,53 @@ VM Monitoring System"""
         }
         
         try:
-            # Analyze alerts
-            alerts = self.analyze_vm_alerts(vm_data)
+            # Without VM data there is nothing to analyze. Still send the report
+            # when a PDF is attached (send_email shim) or the summary itself
+            # shows offline or critical VMs; otherwise there is nothing to say
+            summary_problem = False
+            if not vm_data:
+                summary_alerts = summary.get('alerts') or {}
+                summary_problem = summary.get('offline', 0) > 0 or summary_alerts.get('critical', 0) > 0
+                if not summary_problem and not pdf_path:
+                    logger.info("📭 No VM data, no report and nothing offline or critical - skipping alerts")
+                    return results
+                alerts = AlertBuckets()
+            else:
+                # Analyze alerts
+                alerts = self.analyze_vm_alerts(vm_data)
             
             # Determine overall alert level
-            if alerts['offline'] or alerts['critical']:
+            if alerts.offline or alerts.critical or summary_problem:
                 overall_level = AlertLevel.CRITICAL
-            elif alerts['warning']:
+            elif alerts.warning:
                 overall_level = AlertLevel.WARNING
             else:
                 overall_level = AlertLevel.INFO
             
-            # Create comprehensive alert message
-            alert_message = self._create_alert_message(alerts, summary)
+            # Skip a channel when every alert was already delivered through that
+            # channel within the TTL; healthy (INFO) daily reports are never
+            # suppressed, and an email carrying a PDF report is always sent
+            fingerprints = [
+                self._fingerprint(alert)
+                for bucket in (alerts.offline, alerts.critical, alerts.warning)
+                for alert in bucket
+            ]
+            line_duplicate = bool(fingerprints) and not self._filter_new_fingerprints(fingerprints, 'line_text')
+            email_duplicate = (bool(fingerprints) and not pdf_path
+                               and not self._filter_new_fingerprints(fingerprints, 'email'))
+            send_line = bool(self.line_bot_api) and not line_duplicate
+            send_email = bool(self.config.to_emails) and not email_duplicate
+            if line_duplicate or email_duplicate:
+                results['deduplicated'] = True
+                if not (send_line or send_email):
+                    logger.info("🔁 All %s alerts already sent within %ss - skipping duplicate send",
+                                len(fingerprints), self._dedup_ttl)
+                    return results
+                logger.info("🔁 All %s alerts already sent via %s within %ss - skipping that channel",
+                            len(fingerprints), 'LINE' if line_duplicate else 'email', self._dedup_ttl)
+            
+            # Render subject and bodies once; both channels share them
+            rendered = self._render_alert(alerts, summary, overall_level)
             
             # Determine which channels to use based on alert level
             channels = self._get_channels_for_level(overall_level)
@@ -523,13 +861,72 @@ VM Monitoring System"""
             # Send alerts through appropriate channels - SKIP EMAIL HERE
             # (Email will be sent later in the ALWAYS section to avoid duplication)
             
-            # ALWAYS send LINE notification for daily reports (ignore channel restrictions)
-            if self.line_bot_api:
-                if overall_level == AlertLevel.INFO:
-                    # For healthy systems, send summary
-                    summary_message = f"""✅ Daily VM Infrastructure Report
+            # LINE push and SMTP send are independent network I/O, so dispatch
+            # them concurrently: wall time becomes max(line, email), not the sum.
+            # The PDF is read inside send_email_alert, i.e. on the email worker.
+            line_future = None
+            email_future = None
+            with ThreadPoolExecutor(max_workers=2, thread_name_prefix='alert-dispatch') as pool:
+                # ALWAYS send LINE notification for daily reports (ignore channel restrictions)
+                # (healthy systems get the summary, problems get the alert message)
+                if send_line:
+                    line_future = pool.submit(
+                        self.send_line_alert, rendered.line_body, rendered.level, rendered.timestamp
+                    )
+                
+                # ALWAYS try to send email (unless this exact alert set already went out)
+                if send_email:
+                    email_future = pool.submit(
+                        self.send_email_alert,
+                        subject=rendered.subject,
+                        body=rendered.body,
+                        alert_level=rendered.level,
+                        pdf_path=pdf_path
+                    )
+                elif not self.config.to_emails:
+                    logger.warning("📧 No email recipients configured")
+                    results['email'] = False
+                
+                if line_future is not None:
+                    results['line_text'] = line_future.result()
+                if email_future is not None:
+                    results['email'] = email_future.result()
+            
+            # Record per channel, and only for a real delivery: send_line_alert
+            # also returns True when LINE notifications are disabled
+            if results['line_text'] and line_future is not None and self.config.line_notifications_enabled:
+                self._record_delivered(fingerprints, 'line_text')
+            if results['email']:
+                self._record_delivered(fingerprints, 'email')
+            
+            # Log results; a deduplicated channel is neither sent nor failed
+            channels = [channel for channel, skipped in (('email', email_duplicate),
+                                                         ('line_text', line_duplicate)) if not skipped]
+            successful_channels = [channel for channel in channels if results[channel]]
+            failed_channels = [channel for channel in channels if not results[channel]]
+            
+            if successful_channels:
+                logger.info("✅ Alerts sent via: %s", ', '.join(successful_channels))
+            if failed_channels:
+                logger.warning("⚠️ Failed to send alerts via: %s", ', '.join(failed_channels))
+            
+            return results
+            
+        except Exception as e:
+            logger.error("❌ Failed to send comprehensive alert: %s", e)
+            return results
+    
+    def _render_alert(self, alerts: AlertBuckets, summary: Dict[str, Any],
+                      overall_level: AlertLevel) -> RenderedAlert:
+        """Render every channel's text for one run from a single timestamp"""
+        current_time = _ts()
+        alert_message = self._create_alert_message(alerts, summary, current_time)
+        
+        if overall_level == AlertLevel.INFO:
+            # For healthy systems, LINE gets a short summary instead
+            line_body = f"""✅ Daily VM Infrastructure Report
 
-🕒 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+🕒 {current_time}
 🖥️ One Climate Infrastructure
 
 === STATUS: HEALTHY ===
@@ -542,45 +939,78 @@ VM Monitoring System"""
 🧠 Memory: {summary.get('performance', {}).get('avg_memory', 0):.1f}%
 💽 Storage: {summary.get('performance', {}).get('avg_disk', 0):.1f}%
 
----
-VM Monitoring System"""
-                    
-                    results['line_text'] = self.send_line_alert(summary_message, AlertLevel.INFO)
+{self._line_footer}"""
+        else:
+            line_body = alert_message
+        
+        return RenderedAlert(
+            timestamp=current_time,
+            level=overall_level,
+            body=alert_message,
+            line_body=line_body,
+            subject=self._create_email_subject(summary, overall_level, current_time)
+        )
+    
+    @staticmethod
+    def _fingerprint(alert: Dict[str, Any]) -> str:
+        """Stable identity of an alert across runs
+        
+        Keyed on the threshold crossed rather than the measured value, so a
+        metric drifting from 82.7% to 83.1% is still the same incident.
+        """
+        bucket = 'crit' if alert['level'] is AlertLevel.CRITICAL else 'warn'
+        source = "{}|{}|{}".format(alert.get('vm'), alert.get('metric', 'Offline'), bucket)
+        return hashlib.blake2b(source.encode(), digest_size=16).hexdigest()
+    
+    def _filter_new_fingerprints(self, fingerprints: List[str], channel: str) -> List[str]:
+        """Return fingerprints not delivered via channel within the TTL; count the rest"""
+        if self._dedup_ttl <= 0:
+            return fingerprints
+        
+        now = time.time()
+        new_fingerprints = []
+        with self._dedup_lock:
+            for fp in fingerprints:
+                key = (channel, fp)
+                entry = self._dedup_cache.get(key)
+                if entry is not None and now - entry[0] < self._dedup_ttl:
+                    self._dedup_cache[key] = (entry[0], entry[1] + 1)
                 else:
-                    # Send alert message for problems
-                    results['line_text'] = self.send_line_alert(alert_message, overall_level)
-            
-            # ALWAYS try to send email 
-            if self.config.to_emails:
-                subject = self._create_email_subject(summary, overall_level)
-                
-                # Use the same format as alert_message for email body
-                email_body = alert_message
-                
-                results['email'] = self.send_email_alert(
-                    subject=subject,
-                    body=email_body,
-                    alert_level=overall_level,
-                    pdf_path=pdf_path
-                )
-            else:
-                log_warning("📧 No email recipients configured")
-                results['email'] = False
-            
-            # Log results
-            successful_channels = [channel for channel, success in results.items() if success]
-            failed_channels = [channel for channel, success in results.items() if not success]
-            
-            if successful_channels:
-                log_info("✅ Alerts sent via: {}".format(', '.join(successful_channels)))
-            if failed_channels:
-                log_warning("⚠️ Failed to send alerts via: {}".format(', '.join(failed_channels)))
-            
-            return results
+                    new_fingerprints.append(fp)
+        return new_fingerprints
+    
+    def _record_delivered(self, fingerprints: List[str], channel: str):
+        """Remember fingerprints delivered via channel, evicting expired/oldest entries"""
+        if self._dedup_ttl <= 0 or not fingerprints:
+            return
+        
+        now = time.time()
+        cache = self._dedup_cache
+        with self._dedup_lock:
+            for fp in fingerprints:
+                key = (channel, fp)
+                entry = cache.get(key)
+                if entry is None or now - entry[0] >= self._dedup_ttl:
+                    cache[key] = (now, 0)
             
-        except Exception as e:
-            log_error("❌ Failed to send comprehensive alert: {}".format(e))
-            return results
+            if len(cache) > self._dedup_maxsize:
+                for key in [key for key, entry in cache.items() if now - entry[0] >= self._dedup_ttl]:
+                    del cache[key]
+                while len(cache) > self._dedup_maxsize:
+                    del cache[next(iter(cache))]
+    
+    def send_comprehensive_alert_async(self, vm_data: List[Dict[str, Any]], summary: Dict[str, Any],
+                                       pdf_path: str = None) -> Future:
+        """Queue send_comprehensive_alert on the alert workers and return at once"""
+        return self._get_executor().submit(self.send_comprehensive_alert, vm_data, summary, pdf_path)
+    
+    async def send_comprehensive_alert_aio(self, vm_data: List[Dict[str, Any]], summary: Dict[str, Any],
+                                           pdf_path: str = None) -> Dict[str, bool]:
+        """Awaitable send_comprehensive_alert that keeps the event loop free"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), self.send_comprehensive_alert, vm_data, summary, pdf_path
+        )
     
     def _get_channels_for_level(self, alert_level: AlertLevel) -> List[AlertChannel]:
         """Get appropriate channels for alert level"""
@@ -593,9 +1023,11 @@ VM Monitoring System"""
         else:
             return self.config.info_channels
     
-    def _create_alert_message(self, alerts: Dict[str, Any], summary: Dict[str, Any]) -> str:
+    def _create_alert_message(self, alerts: AlertBuckets, summary: Dict[str, Any],
+                              current_time: str = None) -> str:
         """Create comprehensive alert message"""
-        current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        current_time = _ts(current_time)
+        critical_count, warning_count, offline_count, healthy_count = alerts.counts
         
         message = f"""VM Infrastructure Alert Report
 Generated: {current_time}
@@ -607,34 +1039,34 @@ Offline: {summary.get('offline', 0)} ({summary.get('offline_percent', 0):.1f}%)
 System Status: {summary.get('system_status', 'unknown').upper()}
 
 === ALERT SUMMARY ===
-🚨 Critical: {len(alerts['critical'])}
-⚠️ Warning: {len(alerts['warning'])}
-🔴 Offline: {len(alerts['offline'])}
-✅ Healthy: {len(alerts['healthy'])}
+🚨 Critical: {critical_count}
+⚠️ Warning: {warning_count}
+🔴 Offline: {offline_count}
+✅ Healthy: {healthy_count}
 
 """
         
         # Add offline VMs
-        if alerts['offline']:
+        if alerts.offline:
             message += "=== OFFLINE SYSTEMS ===\n"
-            for alert in alerts['offline']:
+            for alert in alerts.offline:
                 message += "🔴 {}\n".format(alert['message'])
             message += "\n"
         
         # Add critical alerts
-        if alerts['critical']:
+        if alerts.critical:
             message += "=== CRITICAL ALERTS ===\n"
-            for alert in alerts['critical']:
+            for alert in alerts.critical:
                 message += "🚨 {}\n".format(alert['message'])
             message += "\n"
         
         # Add warning alerts
-        if alerts['warning']:
+        if alerts.warning:
             message += "=== WARNING ALERTS ===\n"
-            for alert in alerts['warning'][:5]:  # Limit to first 5
+            for alert in alerts.warning:  # Analyzer keeps only the first 5
                 message += "⚠️ {}\n".format(alert['message'])
-            if len(alerts['warning']) > 5:
-                message += "... and {} more warnings\n".format(len(alerts['warning']) - 5)
+            if alerts.warning_overflow:
+                message += "... and {} more warnings\n".format(alerts.warning_overflow)
             message += "\n"
         
         # Add performance summary
@@ -647,13 +1079,14 @@ System Status: {summary.get('system_status', 'unknown').upper()}
 
 """
         
-        message += "---\nVM Monitoring System\nOne Climate Infrastructure"
+        message += self._footer
         
         return message
     
-    def _create_email_subject(self, summary: Dict[str, Any], alert_level: AlertLevel) -> str:
+    def _create_email_subject(self, summary: Dict[str, Any], alert_level: AlertLevel,
+                              current_time: str = None) -> str:
         """Create email subject based on summary and alert level"""
-        current_date = datetime.now().strftime('%Y-%m-%d')
+        current_date = _ts(current_time)[:10]
         base_subject = "VM Infrastructure Alert - {}".format(current_date)
         
         total_vms = summary.get('total', 0)
@@ -684,10 +1117,15 @@ def send_enhanced_alerts(vm_data: List[Dict[str, Any]], summary: Dict[str, Any],
     """Enhanced alert function that integrates with existing VM report system"""
     try:
         alert_system = EnhancedAlertSystem()
-        results = alert_system.send_comprehensive_alert(vm_data, summary, pdf_path)
-        return any(results.values())
+        try:
+            results = alert_system.send_comprehensive_alert(vm_data, summary, pdf_path)
+        finally:
+            # One-shot instance: QUIT its SMTP session rather than leave it to GC
+            alert_system.close()
+        # 'deduplicated' only marks a skipped send; it is not a delivery
+        return results['email'] or results['line_text']
     except Exception as e:
-        log_error("❌ Enhanced alerts failed: {}".format(e))
+        logger.error("❌ Enhanced alerts failed: %s", e)
         return False
 
 # Backward compatibility function
@@ -5,6 +5,7 @@ Secure loading with validation and encryption support
 """
 
 import os
+import logging
 from pathlib import Path
 from typing import Optional, Dict, Any
 import base64
@@ -36,52 +37,24 @@ REQUIRED_VAR_PROFILES: Dict[str, Dict[str, str]] = {
 }
 
 
-# Safe logger setup
-logger = None
+logger = logging.getLogger(__name__)
 
+# Kept for modules that import these helpers; they forward to logger directly
 def get_logger():
-    """Get logger instance safely"""
-    global logger
-    if logger is None:
-        try:
-            import logging
-            logger = logging.getLogger(__name__)
-        except:
-            logger = None
+    """Get logger instance"""
     return logger
 
 def safe_log_info(message):
     """Safe logging info"""
-    try:
-        log = get_logger()
-        if log:
-            log.info(message)
-        else:
-            print("INFO: {}".format(message))
-    except:
-        print("INFO: {}".format(message))
+    logger.info(message)
 
 def safe_log_error(message):
     """Safe logging error"""
-    try:
-        log = get_logger()
-        if log:
-            log.error(message)
-        else:
-            print("ERROR: {}".format(message))
-    except:
-        print("ERROR: {}".format(message))
+    logger.error(message)
 
 def safe_log_warning(message):
     """Safe logging warning"""
-    try:
-        log = get_logger()
-        if log:
-            log.warning(message)
-        else:
-            print("WARNING: {}".format(message))
-    except:
-        print("WARNING: {}".format(message))
+    logger.warning(message)
 
 
 class SecureEnvLoader:
@@ -103,10 +76,10 @@ class SecureEnvLoader:
                 key = Fernet.generate_key()
                 with open(key_file, 'wb') as f:
                     f.write(key)
-                safe_log_info("🔑 New encryption key generated")
+                logger.info("🔑 New encryption key generated")
                 return key
         except Exception as e:
-            safe_log_warning("⚠️ Could not handle encryption key: {}".format(e))
+            logger.warning("⚠️ Could not handle encryption key: %s", e)
             return None
     
     def encrypt_value(self, value: str) -> str:
@@ -118,7 +91,7 @@ class SecureEnvLoader:
             encrypted = f.encrypt(value.encode())
             return "ENC:{}".format(base64.b64encode(encrypted).decode())
         except Exception as e:
-            safe_log_warning("⚠️ Encryption failed: {}".format(e))
+            logger.warning("⚠️ Encryption failed: %s", e)
             return value
     
     def decrypt_value(self, value: str) -> str:
@@ -130,13 +103,13 @@ class SecureEnvLoader:
             encrypted_data = base64.b64decode(value[4:])
             return f.decrypt(encrypted_data).decode()
         except Exception as e:
-            safe_log_warning("⚠️ Decryption failed: {}".format(e))
+            logger.warning("⚠️ Decryption failed: %s", e)
             return value
     
     def load_env_file(self) -> bool:
         """Load environment variables with enhanced security"""
         if not self.env_path.exists():
-            safe_log_error("❌ Environment file not found: {}".format(self.env_path))
+            logger.error("❌ Environment file not found: %s", self.env_path)
             return False
         
         try:
@@ -170,13 +143,13 @@ class SecureEnvLoader:
                             os.environ[key] = value
                             loaded_vars += 1
                     else:
-                        safe_log_warning("⚠️ Invalid format at line {}: {}".format(line_num, line))
+                        logger.warning("⚠️ Invalid format at line %s: %s", line_num, line)
             
-            safe_log_info("✅ Loaded {} environment variables from: {}".format(loaded_vars, self.env_path))
+            logger.info("✅ Loaded %s environment variables from: %s", loaded_vars, self.env_path)
             return True
             
         except Exception as e:
-            safe_log_error("❌ Error loading environment file: {}".format(e))
+            logger.error("❌ Error loading environment file: %s", e)
             return False
     
     def validate_required_vars(self, profile: str = "report", fail_on_error: bool = True) -> bool:
@@ -215,21 +188,21 @@ class SecureEnvLoader:
             invalid_vars.append("TO_EMAILS - Must not be empty when EMAIL_DRY_RUN=false")
         
         if missing_vars or invalid_vars:
-            safe_log_error("❌ Configuration validation failed (profile: {})".format(profile))
+            logger.error("❌ Configuration validation failed (profile: %s)", profile)
             if missing_vars:
-                safe_log_error("Missing variables:")
+                logger.error("Missing variables:")
                 for var in missing_vars:
-                    safe_log_error("   - {}".format(var))
+                    logger.error("   - %s", var)
             if invalid_vars:
-                safe_log_error("Invalid variables:")
+                logger.error("Invalid variables:")
                 for var in invalid_vars:
-                    safe_log_error("   - {}".format(var))
+                    logger.error("   - %s", var)
             if fail_on_error:
                 return False
-            safe_log_warning("⚠️ Non-strict mode: continue despite env validation errors")
+            logger.warning("⚠️ Non-strict mode: continue despite env validation errors")
             return True
         
-        safe_log_info("✅ All required environment variables validated successfully (profile: {})".format(profile))
+        logger.info("✅ All required environment variables validated successfully (profile: %s)", profile)
         return True
     
     def show_config_summary(self):
@@ -321,16 +294,16 @@ def check_credential_hardening(fail_on_error: Optional[bool] = None) -> bool:
         effective_fail_on_error = fail_on_error or hardening_required or strict_guard
 
     if issues:
-        safe_log_warning("⚠️ Credential hardening check detected issues:")
+        logger.warning("⚠️ Credential hardening check detected issues:")
         for item in issues:
-            safe_log_warning("   - {}".format(item))
+            logger.warning("   - %s", item)
         if effective_fail_on_error:
-            safe_log_error("❌ Credential hardening check failed (enforced)")
+            logger.error("❌ Credential hardening check failed (enforced)")
             return False
-        safe_log_warning("⚠️ Credential hardening check is warn-only in current mode")
+        logger.warning("⚠️ Credential hardening check is warn-only in current mode")
         return True
 
-    safe_log_info("✅ Credential hardening check passed")
+    logger.info("✅ Credential hardening check passed")
     return True
 
 def show_current_config():
@@ -695,26 +695,32 @@ def create_basic_alerts(vm_data):
     }
     
     for vm in vm_data:
+        # Read each field once; the checks below only touch locals
+        name = vm.get('name', 'Unknown')
+        cpu = vm.get('cpu_load', 0)
+        memory = vm.get('memory_used', 0)
+        disk = vm.get('disk_used', 0)
+        
         if not vm.get('is_online', True):
             alerts['offline'].append({
-                'vm': vm.get('name', 'Unknown'),
-                'message': f"{vm.get('name', 'Unknown')} is offline"
+                'vm': name,
+                'message': f"{name} is offline"
             })
-        elif vm.get('cpu_load', 0) > 85 or vm.get('memory_used', 0) > 90 or vm.get('disk_used', 0) > 90:
+        elif cpu > 85 or memory > 90 or disk > 90:
             alerts['critical'].append({
-                'vm': vm.get('name', 'Unknown'),
+                'vm': name,
                 'metric': 'Resource Usage',
-                'message': f"{vm.get('name', 'Unknown')} - High resource usage"
+                'message': f"{name} - High resource usage"
             })
-        elif vm.get('cpu_load', 0) > 70 or vm.get('memory_used', 0) > 75 or vm.get('disk_used', 0) > 80:
+        elif cpu > 70 or memory > 75 or disk > 80:
             alerts['warning'].append({
-                'vm': vm.get('name', 'Unknown'),
+                'vm': name,
                 'metric': 'Resource Usage',
-                'message': f"{vm.get('name', 'Unknown')} - Elevated resource usage"
+                'message': f"{name} - Elevated resource usage"
             })
         else:
             alerts['healthy'].append({
-                'vm': vm.get('name', 'Unknown')
+                'vm': name
             })
     
     return alerts